@@ -1,7 +1,8 @@
 from itertools import chain
 import logging
+import os
 import random
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import torch
@@ -10,7 +11,44 @@ import torch.nn.functional as F
 from components.core.base import BaseAgent
 from components.registry import register
 from models.q_network import QNetwork
-from replay.replay_buffer import ReplayBuffer
+from replay.replay_buffer import ReplayBuffer, emb_dtype_from_name
+
+
+def _bucket_size(n: int) -> int:
+    """n 이상인 가장 작은 2의 거듭제곱을 반환합니다 (컴파일 shape 버킷).
+
+    Args:
+        n (int): 실제 행 개수.
+
+    Returns:
+        int: 패딩 후 행 개수.
+    """
+    return 1 << max(0, (n - 1).bit_length())
+
+
+def _script_module(
+    net: torch.nn.Module, user_dim: int, content_dim: int, device: torch.device
+) -> torch.jit.ScriptModule:
+    """추론용 TorchScript 모듈을 만듭니다. script가 실패하면 trace로 대체합니다.
+
+    반환된 모듈은 원본과 파라미터를 공유하므로 학습 결과가 그대로 반영됩니다.
+
+    Args:
+        net (torch.nn.Module): 원본 Q 네트워크.
+        user_dim (int): 사용자 상태 임베딩 차원.
+        content_dim (int): 콘텐츠 임베딩 차원.
+        device (torch.device): 더미 입력을 만들 디바이스.
+
+    Returns:
+        torch.jit.ScriptModule: 스크립트(또는 trace)된 모듈.
+    """
+    try:
+        return torch.jit.script(net)
+    except Exception as e:
+        logging.warning(f"[DQNAgent] torch.jit.script failed, using trace: {e}")
+        dummy_user = torch.zeros((1, user_dim), device=device)
+        dummy_content = torch.zeros((2, content_dim), device=device)
+        return torch.jit.trace(net, (dummy_user, dummy_content))
 
 
 @register("dqn")
@@ -31,6 +69,12 @@ class DQNAgent(BaseAgent):
         update_freq (int): 타겟 네트워크 업데이트 빈도.
         step_count (int): 학습 단계 카운터.
         loss_type (str): 손실 함수 종류.
+        compile_model (bool): torch.compile 적용 여부.
+        q_net_compiled (nn.Module): 순전파에 사용하는 (컴파일된) Q 네트워크.
+        target_q_net_compiled (nn.Module): 순전파에 사용하는 (컴파일된) 타겟 Q 네트워크.
+        script_model (bool): 추론에 TorchScript 모듈 사용 여부.
+        q_net_infer (nn.Module): select_action/select_slate에서 사용하는 추론용 Q 네트워크.
+        cuda_graph (bool): learn 스텝을 CUDA 그래프로 캡처해 재생할지 여부.
     """
 
     def __init__(
@@ -47,6 +91,10 @@ class DQNAgent(BaseAgent):
         capacity: int,
         loss_type: str = "smooth_l1",
         device: str = "cpu",
+        buffer_dtype: str = "float16",
+        compile_model: bool = False,
+        script_model: bool = False,
+        cuda_graph: bool = False,
     ) -> None:
         """DQNAgent 생성자.
 
@@ -63,15 +111,72 @@ class DQNAgent(BaseAgent):
             capacity (int): 리플레이 버퍼 용량.
             loss_type (str, optional): 손실 함수 종류 ('mse' 또는 'smooth_l1'). 기본값 'smooth_l1'.
             device (str, optional): 사용할 디바이스 ('cpu' 또는 'cuda'). 기본값 'cpu'.
+            buffer_dtype (str, optional): 리플레이 버퍼의 임베딩 저장 dtype
+                ('float32', 'float16', 'bfloat16', 'int8'). 'int8'은 행별 스케일로
+                양자화해 저장하고 gather 시 float32로 복원합니다. 기본값 'float16'.
+            compile_model (bool, optional): Q 네트워크에 torch.compile(reduce-overhead)을
+                적용할지 여부. 작은 그래프에서는 이득이 없을 수 있어 기본값 False.
+            script_model (bool, optional): 추론 경로에 TorchScript 모듈을 사용할지 여부.
+                학습은 항상 eager(또는 컴파일된) 모듈로 수행합니다. 기본값 False.
+            cuda_graph (bool, optional): CUDA 디바이스에서 learn의 순전파/역전파/옵티마이저
+                스텝을 후보 수 버킷별 CUDA 그래프로 캡처해 재생할지 여부.
+                켜면 compile_model 대신 eager 모듈로 캡처합니다. 기본값 False.
+
+        Raises:
+            ValueError: 지원하지 않는 buffer_dtype인 경우.
         """
         self.device = torch.device("cuda" if torch.cuda.is_available() else device)
+        self.user_dim = user_dim
+        self.content_dim = content_dim
         self.q_net = QNetwork(user_dim, content_dim).to(self.device)
         self.target_q_net = QNetwork(user_dim, content_dim).to(self.device)
         self.target_q_net.load_state_dict(self.q_net.state_dict())
         self.target_q_net.eval()
+        # 타겟 동기화 시 state_dict 왕복 없이 바로 복사할 (타겟, 원본) 텐서 쌍
+        self._sync_pairs = list(
+            zip(self.target_q_net.parameters(), self.q_net.parameters())
+        ) + list(zip(self.target_q_net.buffers(), self.q_net.buffers()))
+
+        # 컴파일된 모듈은 원본과 파라미터를 공유하므로 저장/동기화는 원본으로 수행
+        self.compile_model = compile_model
+        if compile_model:
+            self.q_net_compiled = torch.compile(
+                self.q_net, mode="reduce-overhead", fullgraph=True
+            )
+            self.target_q_net_compiled = torch.compile(
+                self.target_q_net, mode="reduce-overhead", fullgraph=True
+            )
+        else:
+            self.q_net_compiled = self.q_net
+            self.target_q_net_compiled = self.target_q_net
+
+        # 단건 추론의 Python 디스패치 비용을 줄이기 위한 TorchScript 사본
+        self.script_model = script_model
+        self.q_net_infer = (
+            _script_module(self.q_net, user_dim, content_dim, self.device)
+            if script_model
+            else self.q_net_compiled
+        )
 
-        self.optimizer = torch.optim.Adam(self.q_net.parameters(), lr=lr)
-        self.buffer = ReplayBuffer(capacity=capacity)
+        # 그래프 재생 시 옵티마이저 step 카운터도 디바이스에 있어야 하므로 capturable 사용
+        self.cuda_graph = cuda_graph and self.device.type == "cuda"
+        self.optimizer = torch.optim.Adam(
+            self.q_net.parameters(), lr=lr, capturable=self.cuda_graph
+        )
+        self.buffer = ReplayBuffer(
+            user_dim,
+            content_dim,
+            capacity=capacity,
+            device=self.device,
+            pin_memory=self.device.type == "cuda",
+            emb_dtype=emb_dtype_from_name(buffer_dtype),
+        )
+        # 후보군 H2D 복사를 순전파와 겹치기 위한 전용 스트림 (CUDA 전용)
+        self._copy_stream = (
+            torch.cuda.Stream(self.device) if self.device.type == "cuda" else None
+        )
+        # CUDA 그래프 캡처 전 워밍업을 실행할 사이드 스트림
+        self._graph_stream = torch.cuda.Stream(self.device) if self.cuda_graph else None
 
         self.gamma = gamma
         self.batch_size = batch_size
@@ -81,6 +186,11 @@ class DQNAgent(BaseAgent):
         self.update_freq = update_freq
         self.step_count = 0
         self.loss_type = loss_type
+        # learn()에서 매 스텝 재사용하는 scratch 텐서 풀 (이름, dtype, shape) -> 텐서
+        self._pool: Dict[Tuple[Any, ...], torch.Tensor] = {}
+        # 후보 수 버킷 -> (캡처된 그래프, 정적 입력/출력 텐서), 버킷별 워밍업 횟수
+        self._graphs: Dict[int, Tuple[Any, Dict[str, torch.Tensor]]] = {}
+        self._graph_warmup: Dict[int, int] = {}
 
     def select_action(
         self, user_state: List[float], candidate_embs: List[List[float]]
@@ -97,13 +207,77 @@ class DQNAgent(BaseAgent):
         if random.random() < self.epsilon:
             return random.randrange(len(candidate_embs))
 
-        us = torch.FloatTensor(user_state).unsqueeze(0).to(self.device)
-        us_rep = us.repeat(len(candidate_embs), 1)
-        ce = torch.FloatTensor(candidate_embs).to(self.device)
+        # NumPy 입력은 중간 리스트 없이 바로 텐서로 변환
+        us = torch.as_tensor(
+            user_state, dtype=torch.float32, device=self.device
+        ).unsqueeze(0)
+        ce = torch.as_tensor(
+            np.asarray(candidate_embs, dtype=np.float32), device=self.device
+        )
+        # [1, user_dim] 상태를 그대로 넘겨 사용자 인코딩은 한 번만 계산
         with torch.no_grad():
-            q_vals = self.q_net(us_rep, ce).squeeze(1)
+            q_vals = self._forward(self.q_net_infer, us, ce).squeeze(1)
         return int(torch.argmax(q_vals).item())
 
+    def act_batch(
+        self,
+        user_states: List[List[float]],
+        candidates_list: List[List[List[float]]],
+    ) -> List[int]:
+        """여러 사용자에 대한 액션을 한 번의 순전파로 선택합니다 (ε-greedy).
+
+        사용자마다 select_action과 같은 방식으로 탐험 여부를 정하고,
+        활용하는 사용자들의 후보는 하나의 배치로 묶어 Q값을 계산합니다.
+
+        Args:
+            user_states (List[List[float]]): 사용자별 상태 임베딩 리스트.
+            candidates_list (List[List[List[float]]]): 사용자별 후보 임베딩 리스트.
+
+        Returns:
+            List[int]: 사용자별로 선택한 후보 인덱스.
+        """
+        actions: List[int] = [0] * len(user_states)
+        exploit: List[int] = []
+        for i, cands in enumerate(candidates_list):
+            if random.random() < self.epsilon:
+                actions[i] = random.randrange(len(cands))
+            else:
+                exploit.append(i)
+        if not exploit:
+            return actions
+
+        counts = [len(candidates_list[i]) for i in exploit]
+        us = torch.as_tensor(
+            np.asarray([user_states[i] for i in exploit], dtype=np.float32),
+            device=self.device,
+        )
+        ce = torch.as_tensor(
+            np.concatenate(
+                [np.asarray(candidates_list[i], dtype=np.float32) for i in exploit]
+            ),
+            device=self.device,
+        )
+        n = ce.size(0)
+        lengths = torch.as_tensor(counts, dtype=torch.long, device=self.device)
+        seg = torch.repeat_interleave(
+            torch.arange(len(exploit), device=self.device), lengths, output_size=n
+        )
+        with torch.no_grad():
+            q_flat = self._forward(
+                self.q_net_infer, us.index_select(0, seg), ce
+            ).squeeze(1)
+
+        # 사용자별 후보를 [사용자 수, 최대 후보 수]로 펼쳐 -inf 패딩 후 argmax
+        offsets = torch.cumsum(lengths, 0) - lengths
+        pos = torch.arange(n, device=self.device) - offsets[seg]
+        scores = torch.full(
+            (len(exploit), max(counts)), float("-inf"), device=self.device
+        )
+        scores[seg, pos] = q_flat
+        for i, action in zip(exploit, scores.argmax(dim=1).cpu().tolist()):
+            actions[i] = action
+        return actions
+
     def store(
         self,
         user_state: List[float],
@@ -124,91 +298,313 @@ class DQNAgent(BaseAgent):
             done (bool): 에피소드 종료 여부.
         """
         self.buffer.push(
-            (user_state, content_emb), reward, (next_state, next_cands_embs), done
+            user_state, content_emb, reward, next_state, next_cands_embs, done
         )
 
-    def learn(self) -> Optional[float]:
+    def learn(self) -> Optional[torch.Tensor]:
         """리플레이 버퍼에서 샘플을 추출해 Q 네트워크를 업데이트합니다.
 
         Returns:
-            Optional[float]: 업데이트된 손실 값. 배치가 부족하면 None을 반환합니다.
+            Optional[torch.Tensor]: 업데이트된 손실 값(detach된 디바이스 텐서).
+                배치가 부족하면 None을 반환합니다.
         """
         if len(self.buffer) < self.batch_size:
             return None
 
         self.step_count += 1
-        # 배치 샘플 추출
-        user_states, content_embs, rewards, next_info, dones = self.buffer.sample(
-            self.batch_size
-        )
-        next_states, next_cands_embs = next_info
+        # 배치 인덱스 샘플링 후 필드별로 재사용 버퍼에 gather
+        idx = self.buffer.sample_indices(self.batch_size)
+        dev_idx = idx.to(self.device)
+        batch_size = dev_idx.size(0)
+        us = self._gather("states", dev_idx, "us")
+        ce = self._gather("cands", dev_idx, "ce")
+        rs = self._gather("rewards", dev_idx, "rs").unsqueeze(1)
+        ds = self._gather("dones", dev_idx, "ds").unsqueeze(1)
+        next_states = self._gather("next_states", dev_idx, "ns")
+        idx_list = idx.tolist()
+
+        if self.cuda_graph:
+            next_cands_host, next_scales_host = self.buffer.gather_next_cands(idx_list)
+            loss = self._learn_graphed(
+                dev_idx, us, ce, rs, ds, next_states, next_cands_host, next_scales_host
+            )
+            return self._finish_step(loss)
+
+        # 가변 길이 후보군은 2의 거듭제곱 용량 버퍼를 잘라 써서 풀 적중률을 높임
+        n_flat = self.buffer.count_next_cands(idx_list)
+        flat_cands_tensor = self._get(
+            "flat_cands",
+            (_bucket_size(n_flat), self.content_dim),
+            dtype=self.buffer.emb_dtype,
+        )[:n_flat]
+        flat_scales = None
+        if self.buffer.quantized:
+            flat_scales = self._get(
+                "flat_scales", (_bucket_size(n_flat),), dtype=torch.float16
+            )[:n_flat]
+
+        if self._copy_stream is not None:
+            # 후보군 전송을 별도 스트림에서 시작해 q_sa 순전파와 겹치게 함
+            next_cands_host, next_scales_host = self.buffer.gather_next_cands(idx_list)
+            self._copy_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(self._copy_stream):
+                flat_cands_tensor.copy_(next_cands_host, non_blocking=True)
+                if flat_scales is not None:
+                    flat_scales.copy_(next_scales_host, non_blocking=True)
+        else:
+            # 전송이 필요 없는 CPU에서는 풀 텐서에 바로 이어붙임
+            self.buffer.gather_next_cands(
+                idx_list, out=flat_cands_tensor, scales_out=flat_scales
+            )
 
-        # 텐서 변환
-        us = torch.tensor(user_states, dtype=torch.float32, device=self.device)
-        ce = torch.tensor(content_embs, dtype=torch.float32, device=self.device)
-        rs = torch.tensor(rewards, dtype=torch.float32, device=self.device).unsqueeze(1)
-        ds = torch.tensor(dones, dtype=torch.float32, device=self.device).unsqueeze(1)
+        # 버퍼의 저정밀 임베딩은 네트워크 입력 시점에만 float32로 변환
+        q_sa = self.q_net_compiled(us.float(), ce.float())
 
-        q_sa = self.q_net(us, ce)
+        if self._copy_stream is not None:
+            torch.cuda.current_stream().wait_stream(self._copy_stream)
 
-        # 최대 Q값을 벡터화로 계산
-        flat_states, flat_cands, batch_indices = [], [], []
-        for i, (ns, nxt) in enumerate(zip(next_states, next_cands_embs)):
-            all_embs = list(chain.from_iterable(nxt.values()))
-            for cand in all_embs:
-                flat_states.append(ns)
-                flat_cands.append(cand)
-                batch_indices.append(i)
-
-        if flat_states:
-            flat_states_tensor = torch.tensor(
-                flat_states, dtype=torch.float32, device=self.device
-            )
-            flat_cands_tensor = torch.tensor(
-                flat_cands, dtype=torch.float32, device=self.device
+        if n_flat > 0:
+            flat_cands = self.buffer.dequantize(flat_cands_tensor, flat_scales)
+            lengths = self.buffer.next_lens.index_select(0, dev_idx)
+            batch_indices = torch.repeat_interleave(
+                torch.arange(batch_size, device=self.device),
+                lengths,
+                output_size=n_flat,
             )
             with torch.no_grad():
-                q_flat = (
-                    self.target_q_net(flat_states_tensor, flat_cands_tensor)
-                    .squeeze(1)
-                    .cpu()
-                    .numpy()
-                )
-            batch_indices = np.array(batch_indices)
-            max_q_per_sample = []
-            for i in range(len(next_states)):
-                sample_qs = q_flat[batch_indices == i]
-                max_q_per_sample.append(sample_qs.max() if len(sample_qs) > 0 else 0.0)
-            max_nq = torch.tensor(
-                max_q_per_sample, dtype=torch.float32, device=self.device
-            ).unsqueeze(1)
+                if self.compile_model:
+                    flat_states_tensor = self._get(
+                        "flat_states",
+                        (_bucket_size(n_flat), self.user_dim),
+                        dtype=next_states.dtype,
+                    )[:n_flat]
+                    torch.index_select(
+                        next_states, 0, batch_indices, out=flat_states_tensor
+                    )
+                    q_flat = self._forward(
+                        self.target_q_net_compiled,
+                        flat_states_tensor.float(),
+                        flat_cands,
+                    ).squeeze(1)
+                else:
+                    q_flat = self._target_q(
+                        next_states, flat_cands, batch_indices
+                    )
         else:
-            max_nq = torch.zeros((len(next_states), 1), device=self.device)
-
-        # 타겟 계산
-        target = rs + self.gamma * max_nq * (1 - ds)
+            q_flat = torch.empty(0, device=self.device)
+            batch_indices = torch.empty(0, dtype=torch.long, device=self.device)
 
-        # 손실 계산
-        if self.loss_type == "mse":
-            loss = F.mse_loss(q_sa, target)
-        elif self.loss_type == "smooth_l1":
-            loss = F.smooth_l1_loss(q_sa, target)
-        else:
-            raise ValueError(f"지원하지 않는 loss_type입니다: {self.loss_type}")
+        loss = self._td_loss(q_sa, q_flat, batch_indices, rs, ds)
 
         # 역전파 및 파라미터 업데이트
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
 
+        return self._finish_step(loss)
+
+    def _finish_step(self, loss: torch.Tensor) -> torch.Tensor:
+        """update_freq 마다 타겟 네트워크를 동기화하고 반환할 손실을 정리합니다.
+
+        Args:
+            loss (torch.Tensor): 이번 스텝의 손실.
+
+        Returns:
+            torch.Tensor: detach된 손실 텐서.
+        """
         # update_freq 마다 타겟 네트워크 동기화
         if self.step_count % self.update_freq == 0:
             logging.info(
                 f"Step {self.step_count}: Loss = {loss.item()}, Epsilon = {self.epsilon:.4f}"
             )
-            self.target_q_net.load_state_dict(self.q_net.state_dict())
+            self._sync_target()
+
+        # 매 스텝 GPU→CPU 동기화를 피하기 위해 스칼라 변환은 호출자에게 맡김
+        return loss.detach()
+
+    def _td_loss(
+        self,
+        q_sa: torch.Tensor,
+        q_flat: torch.Tensor,
+        batch_indices: torch.Tensor,
+        rs: torch.Tensor,
+        ds: torch.Tensor,
+    ) -> torch.Tensor:
+        """후보별 타겟 Q값에서 샘플별 최대값을 구해 TD 손실을 계산합니다.
 
-        return loss.item()
+        batch_indices가 batch_size인 행(그래프 경로의 패딩 후보)은 마지막 더미
+        슬롯으로 모여 버려집니다. 후보가 없는 샘플의 최대 Q값은 0입니다.
+
+        Args:
+            q_sa (torch.Tensor): 현재 Q값, shape=[batch_size, 1].
+            q_flat (torch.Tensor): 후보별 타겟 Q값, shape=[n_flat].
+            batch_indices (torch.Tensor): 후보별 샘플 인덱스, shape=[n_flat].
+            rs (torch.Tensor): 보상, shape=[batch_size, 1].
+            ds (torch.Tensor): 종료 여부, shape=[batch_size, 1].
+
+        Returns:
+            torch.Tensor: 손실 텐서.
+
+        Raises:
+            ValueError: 지원하지 않는 loss_type인 경우.
+        """
+        batch_size = q_sa.size(0)
+        with torch.no_grad():
+            # 샘플별 최대 Q값을 디바이스에서 한 번에 계산
+            max_nq = torch.full((batch_size + 1,), float("-inf"), device=self.device)
+            max_nq.scatter_reduce_(
+                0, batch_indices, q_flat, reduce="amax", include_self=True
+            )
+            max_nq = max_nq[:batch_size]
+            max_nq = torch.where(
+                torch.isinf(max_nq), torch.zeros_like(max_nq), max_nq
+            ).unsqueeze(1)
+
+        # 타겟 계산
+        target = rs + self.gamma * max_nq * (1 - ds)
+
+        # 손실 계산
+        if self.loss_type == "mse":
+            return F.mse_loss(q_sa, target)
+        if self.loss_type == "smooth_l1":
+            return F.smooth_l1_loss(q_sa, target)
+        raise ValueError(f"지원하지 않는 loss_type입니다: {self.loss_type}")
+
+    def _learn_step(
+        self,
+        us: torch.Tensor,
+        ce: torch.Tensor,
+        rs: torch.Tensor,
+        ds: torch.Tensor,
+        next_states: torch.Tensor,
+        flat_cands: torch.Tensor,
+        batch_indices: torch.Tensor,
+    ) -> torch.Tensor:
+        """고정 shape 입력으로 순전파/역전파/옵티마이저 스텝을 수행합니다 (그래프 캡처 대상).
+
+        패딩된 후보 행의 batch_indices는 batch_size를 가리키며, 0으로 채운 더미
+        상태 행과 더미 max 슬롯으로 모여 실제 샘플의 타겟에 영향을 주지 않습니다.
+
+        Args:
+            us (torch.Tensor): 사용자 상태, shape=[batch_size, user_dim].
+            ce (torch.Tensor): 선택 콘텐츠, shape=[batch_size, content_dim].
+            rs (torch.Tensor): 보상, shape=[batch_size, 1].
+            ds (torch.Tensor): 종료 여부, shape=[batch_size, 1].
+            next_states (torch.Tensor): 다음 상태, shape=[batch_size, user_dim].
+            flat_cands (torch.Tensor): 패딩된 다음 후보, shape=[bucket, content_dim].
+            batch_indices (torch.Tensor): 후보별 샘플 인덱스, shape=[bucket].
+
+        Returns:
+            torch.Tensor: 손실 텐서.
+        """
+        q_sa = self.q_net(us, ce)
+        with torch.no_grad():
+            # 패딩 후보는 0으로 채운 더미 상태 행(batch_size)을 가리킴
+            padded_states = F.pad(next_states, (0, 0, 0, 1))
+            q_flat = self._target_q(padded_states, flat_cands, batch_indices)
+
+        loss = self._td_loss(q_sa, q_flat, batch_indices, rs, ds)
+        loss.backward()
+        self.optimizer.step()
+        return loss
+
+    def _learn_graphed(
+        self,
+        dev_idx: torch.Tensor,
+        us: torch.Tensor,
+        ce: torch.Tensor,
+        rs: torch.Tensor,
+        ds: torch.Tensor,
+        next_states: torch.Tensor,
+        next_cands_host: torch.Tensor,
+        next_scales_host: Optional[torch.Tensor],
+    ) -> torch.Tensor:
+        """정적 입력 텐서에 배치를 복사하고 버킷별 CUDA 그래프를 재생합니다.
+
+        버킷마다 처음 3번은 사이드 스트림에서 캡처 없이 실행해 워밍업한 뒤
+        그래프를 캡처합니다. 캡처 이후에는 매 스텝 입력 복사와 replay만 수행합니다.
+
+        Args:
+            dev_idx (torch.Tensor): 디바이스 슬롯 인덱스, shape=[batch_size].
+            us (torch.Tensor): 사용자 상태, shape=[batch_size, user_dim].
+            ce (torch.Tensor): 선택 콘텐츠, shape=[batch_size, content_dim].
+            rs (torch.Tensor): 보상, shape=[batch_size, 1].
+            ds (torch.Tensor): 종료 여부, shape=[batch_size, 1].
+            next_states (torch.Tensor): 다음 상태, shape=[batch_size, user_dim].
+            next_cands_host (torch.Tensor): 이어붙인 다음 후보 (호스트).
+            next_scales_host (Optional[torch.Tensor]): 양자화 스케일 (호스트).
+
+        Returns:
+            torch.Tensor: 이번 스텝의 손실 (정적 출력의 사본).
+        """
+        batch_size = us.size(0)
+        n_flat = next_cands_host.size(0)
+        bucket = _bucket_size(n_flat)
+
+        graph, static = self._graphs.get(bucket, (None, None))
+        if static is None:
+            static = {
+                "us": torch.zeros_like(us, dtype=torch.float32),
+                "ce": torch.zeros_like(ce, dtype=torch.float32),
+                "rs": torch.zeros_like(rs, dtype=torch.float32),
+                "ds": torch.zeros_like(ds, dtype=torch.float32),
+                "next_states": torch.zeros_like(next_states, dtype=torch.float32),
+                "flat_cands": torch.zeros(
+                    (bucket, self.content_dim), device=self.device
+                ),
+                "batch_indices": torch.zeros(
+                    bucket, dtype=torch.long, device=self.device
+                ),
+            }
+            self._graphs[bucket] = (None, static)
+
+        static["us"].copy_(us)
+        static["ce"].copy_(ce)
+        static["rs"].copy_(rs)
+        static["ds"].copy_(ds)
+        static["next_states"].copy_(next_states)
+        if n_flat > 0:
+            cands = next_cands_host.to(self.device, non_blocking=True)
+            scales = (
+                next_scales_host.to(self.device, non_blocking=True)
+                if next_scales_host is not None
+                else None
+            )
+            static["flat_cands"][:n_flat].copy_(self.buffer.dequantize(cands, scales))
+            lengths = self.buffer.next_lens.index_select(0, dev_idx)
+            static["batch_indices"][:n_flat].copy_(
+                torch.repeat_interleave(
+                    torch.arange(batch_size, device=self.device),
+                    lengths,
+                    output_size=n_flat,
+                )
+            )
+        # 패딩 행은 더미 슬롯(batch_size)으로 보냄
+        static["batch_indices"][n_flat:].fill_(batch_size)
+        inputs = {k: v for k, v in static.items() if k != "loss"}
+
+        if graph is None:
+            warmup = self._graph_warmup.get(bucket, 0)
+            if warmup < 3:
+                # 캡처 전 워밍업은 사이드 스트림에서 일반 실행 (실제 학습 스텝으로 사용)
+                self._graph_warmup[bucket] = warmup + 1
+                self._graph_stream.wait_stream(torch.cuda.current_stream())
+                with torch.cuda.stream(self._graph_stream):
+                    self.optimizer.zero_grad(set_to_none=True)
+                    loss = self._learn_step(**inputs)
+                torch.cuda.current_stream().wait_stream(self._graph_stream)
+                return loss
+
+            # 캡처 중 역전파가 그래프 메모리 풀에 grad를 새로 할당하도록 None으로 비움
+            graph = torch.cuda.CUDAGraph()
+            self.optimizer.zero_grad(set_to_none=True)
+            with torch.cuda.graph(graph):
+                static["loss"] = self._learn_step(**inputs)
+            self._graphs[bucket] = (graph, static)
+
+        graph.replay()
+        # 다음 replay가 정적 출력을 덮어쓰므로 사본을 반환
+        return static["loss"].clone()
 
     def select_slate(
         self,
@@ -239,27 +635,123 @@ class DQNAgent(BaseAgent):
             sample_count = min(max_recs, len(all_candidates))
             return random.sample(all_candidates, sample_count)
 
-        # 활용(Exploitation): 각 타입별로 Q값 계산
-        q_values_with_pos: List[Tuple[Tuple[str, int], float]] = []
+        # 활용(Exploitation): 모든 타입의 후보를 이어붙여 한 번에 Q값 계산
+        all_embs = torch.tensor(
+            list(chain.from_iterable(candidate_embs.values())),
+            dtype=torch.float32,
+            device=self.device,
+        )
         state_tensor = torch.tensor(
             state, dtype=torch.float32, device=self.device
         ).unsqueeze(0)
 
-        for ctype, embs in candidate_embs.items():
-            if not embs:
-                continue
+        # [1, user_dim] 상태를 그대로 넘겨 사용자 인코딩은 한 번만 계산
+        with torch.no_grad():
+            q_vals = self._forward(self.q_net_infer, state_tensor, all_embs).squeeze(1)
 
-            cand_tensor = torch.tensor(embs, dtype=torch.float32, device=self.device)
-            state_rep = state_tensor.repeat(len(embs), 1)
+        # all_candidates는 all_embs와 같은 순서이므로 상위 인덱스를 그대로 매핑
+        k = min(max_recs, q_vals.numel())
+        top_idx = torch.topk(q_vals, k).indices.cpu().tolist()
+        return [all_candidates[i] for i in top_idx]
 
-            with torch.no_grad():
-                q_vals = self.q_net(state_rep, cand_tensor).squeeze(1)
+    def _get(
+        self,
+        name: str,
+        shape: Tuple[int, ...],
+        dtype: torch.dtype = torch.float32,
+    ) -> torch.Tensor:
+        """풀에서 (name, dtype, shape)에 해당하는 scratch 텐서를 꺼내거나 새로 할당합니다.
+
+        Args:
+            name (str): 용도 구분용 이름. 같은 shape을 동시에 쓰는 텐서끼리 겹치지 않게 합니다.
+            shape (Tuple[int, ...]): 텐서 shape.
+            dtype (torch.dtype, optional): 텐서 dtype. 기본값 torch.float32.
+
+        Returns:
+            torch.Tensor: 디바이스에 할당된 텐서 (내용은 초기화되지 않음).
+        """
+        key = (name, dtype, *shape)
+        tensor = self._pool.get(key)
+        if tensor is None:
+            tensor = torch.empty(shape, dtype=dtype, device=self.device)
+            self._pool[key] = tensor
+        return tensor
+
+    def _gather(self, field: str, idx: torch.Tensor, name: str) -> torch.Tensor:
+        """버퍼 필드에서 idx 행들을 풀의 scratch 텐서로 gather 합니다.
+
+        Args:
+            field (str): 리플레이 버퍼의 필드 이름.
+            idx (torch.Tensor): 슬롯 인덱스, shape=[batch_size].
+            name (str): scratch 텐서 이름.
 
-            for i, q_val in enumerate(q_vals):
-                q_values_with_pos.append(((ctype, i), q_val.item()))
+        Returns:
+            torch.Tensor: gather 결과, shape=[batch_size, *src.shape[1:]].
+                양자화된 필드는 float32로 복원된 텐서입니다.
+        """
+        src = getattr(self.buffer, field)
+        out = self._get(name, (idx.size(0), *src.shape[1:]), dtype=src.dtype)
+        return self.buffer.gather(field, idx, out=out)
+
+    def _target_q(
+        self,
+        next_states: torch.Tensor,
+        flat_cands: torch.Tensor,
+        batch_indices: torch.Tensor,
+    ) -> torch.Tensor:
+        """펼친 다음 상태 후보들의 타겟 Q값을 계산합니다.
 
-        q_values_with_pos.sort(key=lambda x: x[1], reverse=True)
-        return [item[0] for item in q_values_with_pos[:max_recs]]
+        사용자 인코딩은 샘플당 한 번만 계산해 batch_indices로 펼칩니다.
+
+        Args:
+            next_states (torch.Tensor): 다음 상태, shape=[batch_size, user_dim].
+            flat_cands (torch.Tensor): 펼친 후보, shape=[n_flat, content_dim].
+            batch_indices (torch.Tensor): 후보별 샘플 인덱스, shape=[n_flat].
+
+        Returns:
+            torch.Tensor: 후보별 타겟 Q값, shape=[n_flat].
+        """
+        net = self.target_q_net
+        user_h = net.encode_user(next_states.float()).index_select(0, batch_indices)
+        return net.score(user_h, net.encode_content(flat_cands)).squeeze(1)
+
+    def _forward(
+        self, net: torch.nn.Module, user: torch.Tensor, content: torch.Tensor
+    ) -> torch.Tensor:
+        """가변 길이 후보 배치에 대해 Q 네트워크 순전파를 수행합니다.
+
+        컴파일 모드에서는 후보 수를 2의 거듭제곱 버킷으로 0-패딩하여 후보 수가
+        바뀔 때마다 재컴파일되지 않도록 하고, 결과에서 패딩 행을 잘라냅니다.
+
+        Args:
+            net (torch.nn.Module): 사용할 Q 네트워크.
+            user (torch.Tensor): 사용자 상태, shape=[n, user_dim] 또는 [1, user_dim].
+            content (torch.Tensor): 후보 임베딩, shape=[n, content_dim].
+
+        Returns:
+            torch.Tensor: Q-value, shape=[n, 1].
+        """
+        if not self.compile_model:
+            return net(user, content)
+
+        n = content.size(0)
+        padded = _bucket_size(n)
+        if padded == n:
+            return net(user, content)
+        if user.size(0) == n and n > 1:
+            # expand 뷰는 첫 행만 넘겨 네트워크 내부 브로드캐스트를 이용
+            if user.stride(0) == 0:
+                user = user[:1]
+            else:
+                user = F.pad(user, (0, 0, 0, padded - n))
+        content = F.pad(content, (0, 0, 0, padded - n))
+        return net(user, content)[:n]
+
+    def _sync_target(self) -> None:
+        """Q 네트워크의 파라미터와 버퍼를 타겟 네트워크에 제자리 복사합니다."""
+        with torch.no_grad():
+            for p_tgt, p_src in self._sync_pairs:
+                p_tgt.copy_(p_src, non_blocking=True)
 
     def decay_epsilon(self) -> None:
         """탐험률(epsilon)을 감소시킵니다."""
@@ -268,6 +760,9 @@ class DQNAgent(BaseAgent):
     def save(self, path: str) -> None:
         """에이전트의 상태를 파일로 저장합니다.
 
+        script_model이 켜져 있으면 추론용 TorchScript 모듈을
+        ``<path 확장자 제외>_scripted.pt``로 함께 저장합니다.
+
         Args:
             path (str): 체크포인트 파일 경로.
         """
@@ -283,6 +778,11 @@ class DQNAgent(BaseAgent):
         torch.save(checkpoint, path)
         logging.info(f"[DQNAgent] Checkpoint saved to {path}")
 
+        if self.script_model:
+            script_path = f"{os.path.splitext(path)[0]}_scripted.pt"
+            torch.jit.save(self.q_net_infer, script_path)
+            logging.info(f"[DQNAgent] Scripted Q-network saved to {script_path}")
+
     def load(self, path: str) -> None:
         """저장된 체크포인트 파일에서 에이전트의 상태를 복원합니다.
 
@@ -293,6 +793,19 @@ class DQNAgent(BaseAgent):
         self.q_net.load_state_dict(checkpoint["q_net_state"])
         self.target_q_net.load_state_dict(checkpoint["target_net_state"])
         self.optimizer.load_state_dict(checkpoint["optimizer_state"])
+        # 체크포인트의 capturable 값 대신 현재 설정을 쓰고, step 카운터를 그에 맞는
+        # 디바이스로 옮김 (capturable이면 파라미터 디바이스, 아니면 CPU)
+        for group in self.optimizer.param_groups:
+            group["capturable"] = self.cuda_graph
+            for param in group["params"]:
+                state = self.optimizer.state.get(param, {})
+                if "step" in state:
+                    state["step"] = state["step"].to(
+                        param.device if self.cuda_graph else "cpu"
+                    )
+        # 옵티마이저 상태 텐서가 교체되므로 기존 그래프는 다시 캡처
+        self._graphs.clear()
+        self._graph_warmup.clear()
         self.step_count = checkpoint.get("step_count", 0)
         self.epsilon = checkpoint.get("epsilon", self.epsilon)
         self.epsilon_min = checkpoint.get("epsilon_min", self.epsilon_min)
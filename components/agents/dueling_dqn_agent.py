@@ -1,6 +1,5 @@
 import logging
 import random
-from itertools import chain
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
@@ -10,7 +9,7 @@ import torch.nn.functional as F
 from components.core.base import BaseAgent
 from components.registry import register
 from models.dueling_q_network import DuelingQNetwork
-from replay.replay_buffer import ReplayBuffer
+from replay.replay_buffer import ReplayBuffer, emb_dtype_from_name
 
 
 @register("dueling_dqn")
@@ -47,6 +46,7 @@ class DuelingDQNAgent(BaseAgent):
         capacity: int,
         loss_type: str = "smooth_l1",
         device: str = "cpu",
+        buffer_dtype: str = "float16",
     ) -> None:
         """DuelingDQNAgent 생성자.
 
@@ -63,15 +63,36 @@ class DuelingDQNAgent(BaseAgent):
             capacity (int): 리플레이 버퍼 용량.
             loss_type (str, optional): 손실 함수 ('mse' 또는 'smooth_l1'). 기본값 'smooth_l1'.
             device (str, optional): 사용할 디바이스 ('cpu' 또는 'cuda'). 기본값 'cpu'.
+            buffer_dtype (str, optional): 리플레이 버퍼의 임베딩 저장 dtype
+                ('float32', 'float16', 'bfloat16', 'int8'). 'int8'은 행별 스케일로
+                양자화해 저장하고 gather 시 float32로 복원합니다. 기본값 'float16'.
+
+        Raises:
+            ValueError: 지원하지 않는 buffer_dtype인 경우.
         """
         self.device = torch.device("cuda" if torch.cuda.is_available() else device)
         self.q_net = DuelingQNetwork(user_dim, content_dim).to(self.device)
         self.target_q_net = DuelingQNetwork(user_dim, content_dim).to(self.device)
         self.target_q_net.load_state_dict(self.q_net.state_dict())
         self.target_q_net.eval()
+        # 타겟 동기화 시 state_dict 왕복 없이 바로 복사할 (타겟, 원본) 텐서 쌍
+        self._sync_pairs = list(
+            zip(self.target_q_net.parameters(), self.q_net.parameters())
+        ) + list(zip(self.target_q_net.buffers(), self.q_net.buffers()))
 
         self.optimizer = torch.optim.Adam(self.q_net.parameters(), lr=lr)
-        self.buffer = ReplayBuffer(capacity=capacity)
+        self.buffer = ReplayBuffer(
+            user_dim,
+            content_dim,
+            capacity=capacity,
+            device=self.device,
+            pin_memory=self.device.type == "cuda",
+            emb_dtype=emb_dtype_from_name(buffer_dtype),
+        )
+        # 후보군 H2D 복사를 순전파와 겹치기 위한 전용 스트림 (CUDA 전용)
+        self._copy_stream = (
+            torch.cuda.Stream(self.device) if self.device.type == "cuda" else None
+        )
 
         self.gamma = gamma
         self.batch_size = batch_size
@@ -102,7 +123,7 @@ class DuelingDQNAgent(BaseAgent):
         state_tensor = torch.tensor(
             user_state, dtype=torch.float32, device=self.device
         ).unsqueeze(0)
-        rep_state = state_tensor.repeat(len(candidate_embs), 1)
+        rep_state = state_tensor.expand(len(candidate_embs), -1)
         cand_tensor = torch.tensor(
             candidate_embs, dtype=torch.float32, device=self.device
         )
@@ -130,54 +151,74 @@ class DuelingDQNAgent(BaseAgent):
             done (bool): 에피소드 종료 여부.
         """
         self.buffer.push(
-            (user_state, content_emb), reward, (next_state, next_cands_embs), done
+            user_state, content_emb, reward, next_state, next_cands_embs, done
         )
 
-    def learn(self) -> Optional[float]:
+    def learn(self) -> Optional[torch.Tensor]:
         """버퍼에서 샘플을 추출해 네트워크를 업데이트합니다.
 
         Returns:
-            Optional[float]: 손실 값, 샘플 부족 시 None.
+            Optional[torch.Tensor]: detach된 손실 텐서, 샘플 부족 시 None.
         """
         if len(self.buffer) < self.batch_size:
             return None
         self.step_count += 1
 
-        user_states, content_embs, rewards, next_info, dones = self.buffer.sample(
-            self.batch_size
-        )
-        next_states, next_cands_embs = next_info
-
-        us = torch.tensor(user_states, dtype=torch.float32, device=self.device)
-        ce = torch.tensor(content_embs, dtype=torch.float32, device=self.device)
-        rs = torch.tensor(rewards, dtype=torch.float32, device=self.device).unsqueeze(1)
-        ds = torch.tensor(dones, dtype=torch.float32, device=self.device).unsqueeze(1)
-
-        q_sa = self.q_net(us, ce)
-
-        # next state candidates flatten
-        flat_states, flat_cands, batch_idx = [], [], []
-        for i, (ns, nxt) in enumerate(zip(next_states, next_cands_embs)):
-            for emb in chain.from_iterable(nxt.values()):
-                flat_states.append(ns)
-                flat_cands.append(emb)
-                batch_idx.append(i)
-
-        if flat_states:
-            fs = torch.tensor(flat_states, dtype=torch.float32, device=self.device)
-            fc = torch.tensor(flat_cands, dtype=torch.float32, device=self.device)
+        idx = self.buffer.sample_indices(self.batch_size)
+        dev_idx = idx.to(self.device)
+        us = self.buffer.gather("states", dev_idx)
+        ce = self.buffer.gather("cands", dev_idx)
+        rs = self.buffer.gather("rewards", dev_idx).unsqueeze(1)
+        ds = self.buffer.gather("dones", dev_idx).unsqueeze(1)
+        next_states = self.buffer.gather("next_states", dev_idx)
+        next_cands_host, next_scales_host = self.buffer.gather_next_cands(idx.tolist())
+
+        # 후보군 전송을 별도 스트림에서 시작해 q_sa 순전파와 겹치게 함
+        fc_scales = None
+        if self._copy_stream is not None:
+            self._copy_stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(self._copy_stream):
+                fc = next_cands_host.to(self.device, non_blocking=True)
+                if next_scales_host is not None:
+                    fc_scales = next_scales_host.to(self.device, non_blocking=True)
+        else:
+            fc = next_cands_host.to(self.device)
+            if next_scales_host is not None:
+                fc_scales = next_scales_host.to(self.device)
+
+        # 버퍼의 저정밀 임베딩은 네트워크 입력 시점에만 float32로 변환
+        q_sa = self.q_net(us.float(), ce.float())
+
+        if self._copy_stream is not None:
+            torch.cuda.current_stream().wait_stream(self._copy_stream)
+            fc.record_stream(torch.cuda.current_stream())
+            if fc_scales is not None:
+                fc_scales.record_stream(torch.cuda.current_stream())
+
+        n_flat = fc.size(0)
+
+        batch_size = next_states.size(0)
+        if n_flat > 0:
+            lengths = self.buffer.next_lens.index_select(0, dev_idx)
+            indices = torch.repeat_interleave(
+                torch.arange(batch_size, device=self.device),
+                lengths,
+                output_size=n_flat,
+            )
+            fs = next_states.repeat_interleave(lengths, dim=0, output_size=n_flat)
             with torch.no_grad():
-                q_flat = self.target_q_net(fs, fc).squeeze(1).cpu().numpy()
-            indices = np.array(batch_idx)
-            max_q = []
-            for i in range(len(next_states)):
-                qs = q_flat[indices == i]
-                max_q.append(qs.max() if qs.size else 0.0)
-            max_next = torch.tensor(
-                max_q, dtype=torch.float32, device=self.device
+                q_flat = self.target_q_net(
+                    fs.float(), self.buffer.dequantize(fc, fc_scales)
+                ).squeeze(1)
+            max_next = torch.full((batch_size,), float("-inf"), device=self.device)
+            max_next.scatter_reduce_(
+                0, indices, q_flat, reduce="amax", include_self=True
+            )
+            max_next = torch.where(
+                torch.isinf(max_next), torch.zeros_like(max_next), max_next
             ).unsqueeze(1)
         else:
-            max_next = torch.zeros((len(next_states), 1), device=self.device)
+            max_next = torch.zeros((batch_size, 1), device=self.device)
 
         target = rs + self.gamma * max_next * (1 - ds)
 
@@ -197,9 +238,10 @@ class DuelingDQNAgent(BaseAgent):
             logging.info(
                 f"Step {self.step_count}: Loss={loss.item():.4f}, Epsilon={self.epsilon:.4f}"
             )
-            self.target_q_net.load_state_dict(self.q_net.state_dict())
+            self._sync_target()
 
-        return loss.item()
+        # 매 스텝 GPU→CPU 동기화를 피하기 위해 스칼라 변환은 호출자에게 맡김
+        return loss.detach()
 
     def select_slate(
         self,
@@ -226,21 +268,34 @@ class DuelingDQNAgent(BaseAgent):
         if random.random() < self.epsilon:
             return random.sample(all_cands, min(max_recs, len(all_cands)))
 
+        k = min(max_recs, len(all_cands))
+        if k <= 0:
+            return []
+
+        # advantage 평균이 타입별 배치 기준이므로 순전파는 타입별로 유지
         self.q_net.eval()
-        scores: List[Tuple[Tuple[str, int], float]] = []
+        q_chunks: List[torch.Tensor] = []
         st = torch.tensor(state, dtype=torch.float32, device=self.device).unsqueeze(0)
         for ctype, embs in candidate_embs.items():
             if not embs:
                 continue
             ct = torch.tensor(embs, dtype=torch.float32, device=self.device)
-            rep = st.repeat(len(embs), 1)
+            rep = st.expand(len(embs), -1)
             with torch.no_grad():
-                vals = self.q_net(rep, ct).squeeze(1)
-            for i, v in enumerate(vals):
-                scores.append(((ctype, i), v.item()))
+                q_chunks.append(self.q_net(rep, ct).squeeze(1))
         self.q_net.train()
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return [x[0] for x in scores[:max_recs]]
+
+        # all_cands와 같은 순서의 점수 배열에서 상위 k개만 부분 정렬
+        scores = torch.cat(q_chunks).cpu().numpy()
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [all_cands[i] for i in top]
+
+    def _sync_target(self) -> None:
+        """Q 네트워크의 파라미터와 버퍼를 타겟 네트워크에 제자리 복사합니다."""
+        with torch.no_grad():
+            for p_tgt, p_src in self._sync_pairs:
+                p_tgt.copy_(p_src, non_blocking=True)
 
     def decay_epsilon(self) -> None:
         """탐험률을 감소시킵니다."""
@@ -2,6 +2,7 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
+import torch
 from gymnasium import spaces
 
 
@@ -103,11 +104,12 @@ class BaseAgent(ABC):
         pass
 
     @abstractmethod
-    def learn(self) -> Optional[float]:
+    def learn(self) -> Optional[torch.Tensor]:
         """버퍼에서 샘플을 추출해 정책 혹은 Q-네트워크를 업데이트합니다.
 
         Returns:
-            Optional[float]: 업데이트 손실값, 또는 업데이트가 수행되지 않으면 None.
+            Optional[torch.Tensor]: 업데이트 손실값(디바이스에 남아 있는 스칼라 텐서),
+                또는 업데이트가 수행되지 않으면 None.
         """
         pass
 
@@ -104,7 +104,7 @@ def compute_all_q_values(
 
     # 배치 텐서 생성 및 Q값 추론
     state_t = torch.tensor(state, dtype=torch.float32, device=agent.device)
-    state_batch = state_t.unsqueeze(0).repeat(len(all_embs), 1)
+    state_batch = state_t.unsqueeze(0).expand(len(all_embs), -1)
     content_batch = torch.tensor(
         np.stack(all_embs), dtype=torch.float32, device=agent.device
     )
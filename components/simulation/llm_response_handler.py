@@ -2,7 +2,57 @@ import logging
 import random
 import json
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba 미설치 환경에서는 동일 로직을 NumPy로 실행
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# 앞쪽 ``` 또는 ```json, 뒤쪽 ``` 마크다운 코드펜스
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+# int64로 정확히 변환되는 가장 큰 float64 (2**63 바로 아래)
+_MAX_DWELL = float(np.nextafter(np.float64(2.0**63), 0.0))
+
+
+@njit(cache=True)
+def _validate(clicked: np.ndarray, dwell: np.ndarray) -> np.ndarray:
+    """클릭 여부에 맞춰 체류시간 배열을 보정합니다.
+
+    음수·비정상 값이거나 클릭하지 않은 항목의 체류시간은 0으로 만들고,
+    나머지는 int64 범위로 자른 뒤 정수(초)로 내림합니다.
+
+    Args:
+        clicked (np.ndarray): 클릭 여부, dtype=bool.
+        dwell (np.ndarray): 체류시간, dtype=float64.
+
+    Returns:
+        np.ndarray: 보정된 체류시간, dtype=int64.
+    """
+    valid = clicked & np.isfinite(dwell) & (dwell >= 0)
+    return np.minimum(np.where(valid, dwell, 0.0), _MAX_DWELL).astype(np.int64)
+
+
+def _raw_dwell_time(response: Dict) -> float:
+    """응답에서 체류시간 원시 값을 꺼냅니다. 숫자가 아니면 -1을 반환합니다.
+
+    Args:
+        response (Dict): 단일 콘텐츠에 대한 응답 딕셔너리.
+
+    Returns:
+        float: 체류시간(초) 또는 -1.
+    """
+    dwell_time = response.get("dwell_time_seconds", response.get("dwell_time", 0))
+    if not isinstance(dwell_time, (int, float)):
+        return -1.0
+    return float(dwell_time)
 
 
 class LLMResponseHandler:
@@ -46,9 +96,9 @@ class LLMResponseHandler:
         # 기존 text: 마크다운 코드펜스 포함 가능
         text = text.strip()
 
-        # 정규식으로 앞뒤 마크다운 코드펜스 제거
-        text = re.sub(r"^```(?:json)?\s*", "", text)  # 앞쪽 ``` 또는 ```json
-        text = re.sub(r"\s*```$", "", text)  # 뒤쪽 ```
+        # 코드펜스가 있을 때만 미리 컴파일한 정규식으로 앞뒤 펜스 제거
+        if text.startswith("```") or text.endswith("```"):
+            text = _FENCE_RE.sub("", text)
 
         # JSON 파싱
         try:
@@ -163,51 +213,72 @@ class LLMResponseHandler:
             List[Dict]: 각 콘텐츠별 응답 딕셔너리 리스트 (content_id, clicked, dwell_time).
         """
 
-        result = []
         content_ids = [content.get("id") for content in all_contents]
+        # 응답이 매칭된 콘텐츠 위치 표시 (누락 콘텐츠 탐색용)
+        seen = np.zeros(len(all_contents), dtype=np.bool_)
 
+        # (content_id, 응답) 매칭. 형식이 잘못된 응답은 None으로 두어 기본값 처리
+        matched: List[Tuple[int, Optional[Dict]]] = []
         for i, resp in enumerate(responses):
             if not isinstance(resp, dict):
                 if self.debug:
                     logging.warning("Invalid response format at index %d: %s", i, resp)
                 # 폴백으로 해당 콘텐츠에 대해 기본 응답 추가
                 if i < len(content_ids):
-                    result.append(
-                        {
-                            "content_id": content_ids[i],
-                            "clicked": False,
-                            "dwell_time": 0,
-                        }
-                    )
+                    matched.append((content_ids[i], None))
+                    seen[i] = True
                 continue
 
-            content_id = int(resp.get("content_id"))
-            if content_id is not None:
-                # 순서대로 매칭 시도
-                if i < len(content_ids):
-                    content_id = content_ids[i]
-                else:
-                    continue
+            # 응답의 content_id는 쓰지 않고 순서대로 매칭 (콘텐츠 수를 넘는 응답은 무시)
+            if i >= len(content_ids):
+                continue
+            matched.append((content_ids[i], resp))
+            seen[i] = True
+
+        # 한 번의 순회로 원시 값을 배열화한 뒤 컴파일된 루틴에서 일괄 검증
+        n = len(matched)
+        clicked_arr = np.fromiter(
+            (
+                resp is not None and resp.get("clicked", False) is True
+                for _, resp in matched
+            ),
+            dtype=np.bool_,
+            count=n,
+        )
+        raw_dwell = np.fromiter(
+            (_raw_dwell_time(resp) if resp is not None else 0.0 for _, resp in matched),
+            dtype=np.float64,
+            count=n,
+        )
+        dwell_arr = _validate(clicked_arr, raw_dwell)
+        clicked_list = clicked_arr.tolist()
+        dwell_list = dwell_arr.tolist()
 
-            # 단일 응답 파싱
-            clicked, dwell_time = self._parse_single_response_for_all(resp, content_id)
+        if self.debug:
+            # 보정은 위 배열 경로가 담당하고, 디버그 모드는 항목별 경고만 추가
+            for (content_id, resp), clicked, raw, dwell_time in zip(
+                matched, clicked_list, raw_dwell.tolist(), dwell_list
+            ):
+                if resp is not None:
+                    self._log_response_corrections(
+                        content_id, resp, clicked, raw, dwell_time
+                    )
 
-            result.append(
-                {"content_id": content_id, "clicked": clicked, "dwell_time": dwell_time}
+        result = [
+            {"content_id": content_id, "clicked": clicked, "dwell_time": dwell_time}
+            for (content_id, _), clicked, dwell_time in zip(
+                matched, clicked_list, dwell_list
             )
+        ]
 
         # 누락된 콘텐츠에 대해 기본 응답 추가
-        response_content_ids = {int(resp["content_id"]) for resp in result}
-        for content in all_contents:
-            content_id = content.get("id")
-            if content_id not in response_content_ids:
-                if self.debug:
-                    logging.warning(
-                        "No response for content_id: %s, adding default", content_id
-                    )
-                result.append(
-                    {"content_id": content_id, "clicked": False, "dwell_time": 0}
+        for i in np.flatnonzero(~seen):
+            content_id = content_ids[i]
+            if self.debug:
+                logging.warning(
+                    "No response for content_id: %s, adding default", content_id
                 )
+            result.append({"content_id": content_id, "clicked": False, "dwell_time": 0})
 
         if self.debug:
             clicked_count = sum(1 for resp in result if resp["clicked"])
@@ -217,64 +288,51 @@ class LLMResponseHandler:
 
         return result
 
-    def _parse_single_response_for_all(
-        self, response: Dict, content_id: int
-    ) -> Tuple[bool, int]:
-        """단일 응답을 파싱하여 클릭 여부와 체류시간을 반환합니다.
+    def _log_response_corrections(
+        self,
+        content_id: int,
+        response: Dict,
+        clicked: bool,
+        raw_dwell: float,
+        dwell_time: int,
+    ) -> None:
+        """``_validate``가 단일 응답에 적용한 보정 내역을 경고 로그로 남깁니다.
 
         Args:
-            response (Dict): 단일 콘텐츠에 대한 응답 딕셔너리.
             content_id (int): 검증 대상 콘텐츠 ID.
-
-        Returns:
-            Tuple[bool, int]: (클릭 여부, 체류 시간(초)).
-
-        Notes:
-            - 입력 값에 이상이 있으면 경고 로그를 남기고 보정합니다.
-            - dwell_time은 음수일 수 없으며, 클릭하지 않은 경우 항상 0입니다.
+            response (Dict): 단일 콘텐츠에 대한 원본 응답 딕셔너리.
+            clicked (bool): 보정된 클릭 여부.
+            raw_dwell (float): 보정 전 체류시간 (숫자가 아니면 -1).
+            dwell_time (int): 보정된 체류시간(초).
         """
-        # 클릭 여부 추출 및 검증
-        clicked = response.get("clicked", False)
-        if not isinstance(clicked, bool):
-            if self.debug:
-                logging.warning(
-                    "Invalid clicked value for %d: %s, using False", content_id, clicked
-                )
-            clicked = False
-
-        # 체류시간 추출 및 검증
-        dwell_time = response.get("dwell_time_seconds", response.get("dwell_time", 0))
-        if not isinstance(dwell_time, (int, float)) or dwell_time < 0:
-            if self.debug:
-                logging.warning(
-                    "Invalid dwell_time for %d: %s, using 0", content_id, dwell_time
-                )
-            dwell_time = 0
-
-        # 클릭했는데 체류시간이 0인 경우 로직 검증
-        if clicked and dwell_time == 0:
-            if self.debug:
-                logging.warning("Content %d: clicked=True but dwell_time=0", content_id)
-
-        # 클릭하지 않았는데 체류시간이 있는 경우 0으로 보정
-        if not clicked and dwell_time > 0:
-            if self.debug:
-                logging.warning(
-                    "Content %d: clicked=False but dwell_time=%d, correcting to 0",
-                    content_id,
-                    dwell_time,
-                )
-            dwell_time = 0
+        raw_clicked = response.get("clicked", False)
+        if not isinstance(raw_clicked, bool):
+            logging.warning(
+                "Invalid clicked value for %d: %s, using False", content_id, raw_clicked
+            )
 
-        if self.debug:
-            logging.debug(
-                "Parsed response for %d: clicked=%s, dwell_time=%ds",
+        if not np.isfinite(raw_dwell) or raw_dwell < 0:
+            logging.warning(
+                "Invalid dwell_time for %d: %s, using 0",
+                content_id,
+                response.get("dwell_time_seconds", response.get("dwell_time", 0)),
+            )
+        elif not clicked and raw_dwell > 0:
+            logging.warning(
+                "Content %d: clicked=False but dwell_time=%s, correcting to 0",
                 content_id,
-                clicked,
-                int(dwell_time),
+                raw_dwell,
             )
 
-        return clicked, int(dwell_time)
+        if clicked and dwell_time == 0:
+            logging.warning("Content %d: clicked=True but dwell_time=0", content_id)
+
+        logging.debug(
+            "Parsed response for %d: clicked=%s, dwell_time=%ds",
+            content_id,
+            clicked,
+            dwell_time,
+        )
 
     def _create_fallback_all_responses(self, all_contents: List[Dict]) -> List[Dict]:
         """LLM 응답 실패 시 모든 콘텐츠에 대해 폴백(랜덤) 응답을 생성합니다.
@@ -53,13 +53,13 @@ class DuelingQNetwork(nn.Module):
         사용자/콘텐츠 벡터를 받아 Dueling 구조로 Q-value를 예측합니다.
 
         Args:
-            user (torch.Tensor): [batch_size, user_dim]
+            user (torch.Tensor): [batch_size, user_dim] 또는 [1, user_dim] (브로드캐스트)
             content (torch.Tensor): [batch_size, content_dim]
 
         Returns:
             torch.Tensor: [batch_size, 1] Q-value
         """
-        x = torch.cat([user, content], dim=-1)
+        x = torch.cat([user.expand(content.size(0), -1), content], dim=-1)
         h = self.shared(x)
         v = self.value_stream(h)
         a = self.adv_stream(h)
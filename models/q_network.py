@@ -1,17 +1,22 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 
 class QNetwork(nn.Module):
     """Q-Value를 예측하는 MLP 네트워크.
 
+    첫 번째 Linear 층은 [user, content] 결합 입력에 대한 것이므로 가중치를 사용자/콘텐츠
+    부분으로 나누면 encode_user(user) + encode_content(content)와 같습니다. 이를 이용해
+    사용자·콘텐츠 인코딩을 따로 계산(및 재사용)한 뒤 score로 Q-value를 구할 수 있습니다.
+
     Args:
         user_dim (int): 사용자 임베딩 벡터 차원.
         content_dim (int): 콘텐츠 임베딩 벡터 차원.
         hidden_dim (int, optional): 은닉층 크기. 기본값은 128.
 
     Input:
-        user (torch.Tensor): [batch_size, user_dim]
+        user (torch.Tensor): [batch_size, user_dim] 또는 [1, user_dim] (브로드캐스트)
         content (torch.Tensor): [batch_size, content_dim]
 
     Output:
@@ -44,6 +49,7 @@ class QNetwork(nn.Module):
 
         Args:
             user (torch.Tensor): 사용자 임베딩, shape=[batch_size, user_dim].
+                shape=[1, user_dim]이면 모든 콘텐츠에 대해 브로드캐스트됩니다.
             content (torch.Tensor): 콘텐츠 임베딩, shape=[batch_size, content_dim].
 
         Returns:
@@ -52,7 +58,7 @@ class QNetwork(nn.Module):
         Raises:
             ValueError: 배치 크기 또는 입력 차원이 예상과 일치하지 않을 때.
         """
-        if user.shape[0] != content.shape[0]:
+        if user.shape[0] != content.shape[0] and user.shape[0] != 1:
             raise ValueError(
                 f"Batch size mismatch: user.shape={user.shape}, content.shape={content.shape}"
             )
@@ -60,5 +66,43 @@ class QNetwork(nn.Module):
             raise ValueError(
                 f"Input dim mismatch: user_dim={user.shape[1]}, expected={self.user_dim}; content_dim={content.shape[1]}, expected={self.content_dim}"
             )
-        x = torch.cat([user, content], dim=1)
-        return self.net(x)  # [batch, 1]
+        # 단일 사용자 상태는 한 번만 인코딩한 뒤 score에서 브로드캐스트
+        return self.score(self.encode_user(user), self.encode_content(content))
+
+    def encode_user(self, user: torch.Tensor) -> torch.Tensor:
+        """사용자 임베딩에 첫 번째 층의 사용자 부분 가중치(와 bias)를 적용합니다.
+
+        Args:
+            user (torch.Tensor): 사용자 임베딩, shape=[batch_size, user_dim].
+
+        Returns:
+            torch.Tensor: 사용자 인코딩, shape=[batch_size, hidden_dim].
+        """
+        first = self.net[0]
+        return F.linear(user, first.weight[:, : self.user_dim], first.bias)
+
+    def encode_content(self, content: torch.Tensor) -> torch.Tensor:
+        """콘텐츠 임베딩에 첫 번째 층의 콘텐츠 부분 가중치를 적용합니다.
+
+        Args:
+            content (torch.Tensor): 콘텐츠 임베딩, shape=[batch_size, content_dim].
+
+        Returns:
+            torch.Tensor: 콘텐츠 인코딩, shape=[batch_size, hidden_dim].
+        """
+        return F.linear(content, self.net[0].weight[:, self.user_dim :])
+
+    def score(self, user_h: torch.Tensor, content_h: torch.Tensor) -> torch.Tensor:
+        """사용자/콘텐츠 인코딩으로부터 Q-value를 계산합니다.
+
+        Args:
+            user_h (torch.Tensor): 사용자 인코딩, shape=[batch_size, hidden_dim]
+                또는 [1, hidden_dim] (브로드캐스트).
+            content_h (torch.Tensor): 콘텐츠 인코딩, shape=[batch_size, hidden_dim].
+
+        Returns:
+            torch.Tensor: Q-value, shape=[batch_size, 1].
+        """
+        x = torch.relu(user_h + content_h)
+        x = torch.relu(self.net[2](x))
+        return self.net[4](x)  # [batch, 1]
@@ -1,91 +1,363 @@
 import random
-from collections import deque
-from typing import Any, Deque, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+# 설정 문자열 -> 리플레이 버퍼 임베딩 저장 dtype
+_EMB_DTYPES: Dict[str, torch.dtype] = {
+    "float32": torch.float32,
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+    "int8": torch.int8,
+}
+
+
+def emb_dtype_from_name(name: str) -> torch.dtype:
+    """설정의 buffer_dtype 문자열을 임베딩 저장 dtype으로 변환합니다.
+
+    Args:
+        name (str): 'float32', 'float16', 'bfloat16', 'int8' 중 하나.
+
+    Returns:
+        torch.dtype: 대응하는 torch dtype.
+
+    Raises:
+        ValueError: 지원하지 않는 이름인 경우.
+    """
+    if name not in _EMB_DTYPES:
+        raise ValueError(f"지원하지 않는 buffer_dtype입니다: {name}")
+    return _EMB_DTYPES[name]
 
 
 class ReplayBuffer:
     """경험을 저장하고 배치 샘플링을 지원하는 리플레이 버퍼 클래스.
 
+    필드별로 미리 할당한 텐서(SoA)에 transition을 순환(ring) 방식으로 기록하며,
+    샘플링은 인덱스 텐서만 반환합니다. 호출자는 ``index_select``로 필요한 필드를
+    한 번에 gather 합니다. push는 transition을 대기 목록에만 쌓고, 저장 텐서에는
+    샘플링 직전 flush에서 필드별 한 번의 복사로 기록합니다.
+
+    emb_dtype이 torch.int8이면 임베딩을 행(임베딩)별 대칭 스케일
+    (scale = max|e| / 127, float16)로 양자화해 저장하고, ``gather``/``dequantize``에서
+    float32로 복원합니다. 스케일이 행의 최댓값으로 정해지므로 한 행에 크기가 크게
+    다른 특성이 섞여 있으면 (예: simple_user의 체류시간(초)과 [0, 1] 비율) 작은
+    특성이 0으로 양자화됩니다. 이런 임베딩에는 float16 이상을 사용하세요.
+
     Attributes:
         capacity (int): 최대 저장 가능 transition 개수.
-        buffer (Deque): transition 저장소.
+        device (torch.device): 저장 텐서가 위치한 디바이스.
+        content_dim (int): 콘텐츠 임베딩 차원.
+        pin_memory (bool): 후보군 gather 결과를 pinned 메모리에 둘지 여부.
+        emb_dtype (torch.dtype): 상태/콘텐츠 임베딩 저장 dtype.
+        quantized (bool): int8 양자화 저장 여부.
+        scales (Dict[str, torch.Tensor]): 양자화 시 필드별 행 스케일, shape=[capacity].
+        states (torch.Tensor): 사용자 상태, shape=[capacity, user_dim].
+        cands (torch.Tensor): 선택한 콘텐츠 임베딩, shape=[capacity, content_dim].
+        rewards (torch.Tensor): 보상, shape=[capacity].
+        next_states (torch.Tensor): 다음 사용자 상태, shape=[capacity, user_dim].
+        dones (torch.Tensor): 에피소드 종료 여부(0/1), shape=[capacity].
+        next_cands (List[Optional[torch.Tensor]]): 슬롯별 다음 상태 후보군 임베딩
+            (타입별로 이어붙인 [n_i, content_dim] 텐서, 호스트 메모리).
+        next_cands_scale (List[Optional[torch.Tensor]]): 양자화 시 슬롯별 후보 스케일.
+        next_lens (torch.Tensor): 슬롯별 다음 상태 후보 개수 n_i, shape=[capacity].
+        ptr (int): 지금까지 기록된 transition 수 (다음 기록 위치 = ptr % capacity).
+        size (int): 현재 저장된 transition 개수.
     """
 
-    def __init__(self, capacity: int = 10000) -> None:
+    def __init__(
+        self,
+        user_dim: int,
+        content_dim: int,
+        capacity: int = 10000,
+        device: str = "cpu",
+        pin_memory: bool = False,
+        emb_dtype: torch.dtype = torch.float32,
+    ) -> None:
         """ReplayBuffer 생성자.
 
         Args:
+            user_dim (int): 사용자 상태 임베딩 차원.
+            content_dim (int): 콘텐츠 임베딩 차원.
             capacity (int, optional): 최대 transition 개수. 기본값은 10000.
+            device (str, optional): 저장 텐서를 할당할 디바이스. 기본값은 'cpu'.
+            pin_memory (bool, optional): 호스트에 있는 후보군을 gather할 때 pinned
+                메모리로 모아 비동기 H2D 복사를 가능하게 할지 여부. 기본값은 False.
+            emb_dtype (torch.dtype, optional): 상태/콘텐츠 임베딩 저장 dtype.
+                float16을 쓰면 메모리와 전송량이 절반, int8이면 약 1/4이 됩니다.
+                기본값은 torch.float32.
         """
         self.capacity: int = capacity
-        self.buffer: Deque[
-            Tuple[
-                Tuple[Any, Any],  # (user_state, content_emb)
-                float,  # reward
-                Tuple[Any, Any],  # (next_state, next_cands_embs)
-                bool,  # done
-            ]
-        ] = deque(maxlen=capacity)
+        self.device = torch.device(device)
+        self.content_dim: int = content_dim
+        self.pin_memory: bool = pin_memory
+        self.emb_dtype: torch.dtype = emb_dtype
+        self.quantized: bool = emb_dtype == torch.int8
+
+        self.states = torch.zeros(
+            (capacity, user_dim), dtype=emb_dtype, device=self.device
+        )
+        self.cands = torch.zeros(
+            (capacity, content_dim), dtype=emb_dtype, device=self.device
+        )
+        self.rewards = torch.zeros(capacity, dtype=torch.float32, device=self.device)
+        self.next_states = torch.zeros(
+            (capacity, user_dim), dtype=emb_dtype, device=self.device
+        )
+        self.dones = torch.zeros(capacity, dtype=torch.float32, device=self.device)
+        self.next_cands: List[Optional[torch.Tensor]] = [None] * capacity
+        self.next_lens = torch.zeros(capacity, dtype=torch.long, device=self.device)
+
+        self.scales: Dict[str, torch.Tensor] = {}
+        self.next_cands_scale: List[Optional[torch.Tensor]] = [None] * capacity
+        if self.quantized:
+            for name in ("states", "cands", "next_states"):
+                self.scales[name] = torch.zeros(
+                    capacity, dtype=torch.float16, device=self.device
+                )
+
+        self.ptr: int = 0
+        self.size: int = 0
+        # flush 대기 중인 (slot, state, content_emb, reward, next_state, done)
+        self._pending: List[Tuple[int, Any, Any, float, Any, bool]] = []
 
     def push(
         self,
-        state_action_pair: Tuple[Any, Any],
+        user_state: Any,
+        content_emb: Any,
         reward: float,
-        next_transition: Tuple[Any, Any],
+        next_state: Any,
+        next_cands: Dict[str, Sequence[Any]],
         done: bool,
     ) -> None:
-        """새 transition을 버퍼에 추가합니다.
+        """새 transition을 버퍼의 다음 슬롯에 기록합니다.
+
+        버퍼가 가득 찬 경우 가장 오래된 transition을 덮어씁니다.
 
         Args:
-            state_action_pair (Tuple[Any, Any]): (user_state, content_emb)
+            user_state (Any): 현재 사용자 상태 임베딩.
+            content_emb (Any): 액션에 해당하는 콘텐츠 임베딩.
             reward (float): 보상 값
-            next_transition (Tuple[Any, Any]): (next_state, next_cands_embs)
+            next_state (Any): 다음 사용자 상태 임베딩.
+            next_cands (Dict[str, Sequence[Any]]): 다음 상태에서의 타입별 후보군 임베딩.
+                타입별 후보를 이어붙여 [n_i, content_dim]으로 저장합니다.
             done (bool): 에피소드 종료 여부
         """
-        self.buffer.append((state_action_pair, reward, next_transition, done))
+        # 같은 슬롯이 대기 목록에 두 번 들어가지 않도록 한 바퀴마다 flush
+        if len(self._pending) >= self.capacity:
+            self.flush()
+
+        slot = self.ptr % self.capacity
+        self._pending.append((slot, user_state, content_emb, reward, next_state, done))
+        # 타입별 후보군을 한 번만 이어붙여 [n_i, content_dim] 텐서로 저장
+        flat_next_cands = []
+        for embs in next_cands.values():
+            if len(embs) == 0:
+                continue
+            arr = np.asarray(embs, dtype=np.float32)
+            assert arr.ndim == 2 and arr.shape[1] == self.content_dim, (
+                f"next candidate embeddings must be [n, {self.content_dim}], "
+                f"got {arr.shape}"
+            )
+            flat_next_cands.append(arr)
+        stacked = torch.from_numpy(
+            np.concatenate(flat_next_cands)
+            if flat_next_cands
+            else np.empty((0, self.content_dim), dtype=np.float32)
+        )
+        if self.quantized:
+            stacked, self.next_cands_scale[slot] = self._quantize(stacked)
+        self.next_cands[slot] = stacked.to(self.emb_dtype)
+
+        self.ptr += 1
+        self.size = min(self.size + 1, self.capacity)
+
+    def flush(self) -> None:
+        """대기 중인 transition들을 필드별로 한 번에 저장 텐서에 기록합니다.
+
+        push마다 필드별 텐서 연산(디바이스 복사 포함)을 수행하는 대신,
+        모아 둔 행들을 스택한 뒤 필드당 한 번의 ``index_copy_``로 씁니다.
+        """
+        if not self._pending:
+            return
+        slots, states, cands, rewards, next_states, dones = zip(*self._pending)
+        self._pending.clear()
+
+        idx = torch.tensor(slots, dtype=torch.long, device=self.device)
+        for name, rows in (
+            ("states", states),
+            ("cands", cands),
+            ("next_states", next_states),
+        ):
+            values, scale = self._stack(rows)
+            getattr(self, name).index_copy_(0, idx, values)
+            if scale is not None:
+                self.scales[name].index_copy_(0, idx, scale)
+        self.rewards.index_copy_(
+            0, idx, torch.tensor(rewards, dtype=torch.float32, device=self.device)
+        )
+        self.dones.index_copy_(
+            0, idx, torch.tensor(dones, dtype=torch.float32, device=self.device)
+        )
+        self.next_lens.index_copy_(
+            0,
+            idx,
+            torch.tensor(
+                [self.next_cands[slot].size(0) for slot in slots],
+                dtype=torch.long,
+                device=self.device,
+            ),
+        )
+
+    def _stack(
+        self, rows: Sequence[Any]
+    ) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+        """임베딩 행들을 저장 dtype/디바이스의 [len(rows), dim] 텐서로 묶습니다.
+
+        Args:
+            rows (Sequence[Any]): 임베딩 벡터 시퀀스.
+
+        Returns:
+            Tuple[torch.Tensor, Optional[torch.Tensor]]: 스택된 텐서와
+                (양자화 시) 행별 스케일.
+        """
+        stacked = torch.from_numpy(np.asarray(rows, dtype=np.float32))
+        scale = None
+        if self.quantized:
+            stacked, scale = self._quantize(stacked)
+            scale = scale.to(self.device)
+        return stacked.to(device=self.device, dtype=self.emb_dtype), scale
 
-    def sample(
-        self, batch_size: int
-    ) -> Tuple[
-        List[Any], List[Any], List[float], Tuple[List[Any], List[Any]], List[bool]
-    ]:
-        """랜덤하게 batch_size 개수만큼 transition을 샘플링합니다.
+    @staticmethod
+    def _quantize(values: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """float32 임베딩 행들을 행별 대칭 스케일로 int8 양자화합니다.
+
+        스케일은 float16으로 변환한 뒤 float16 최소 정규값으로 하한을 두므로,
+        임베더가 반환하는 영벡터는 0으로, 아주 작은 행은 0 근처 값으로 복원되고
+        NaN이 생기지 않습니다.
+
+        Args:
+            values (torch.Tensor): 임베딩, shape=[n, dim], dtype=float32.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: int8 값 [n, dim]과 float16 스케일 [n].
+        """
+        # 1e-8 같은 하한은 float16 변환 시 0이 되므로 변환 후에 클램프
+        scale = (values.abs().amax(dim=1) / 127.0).half()
+        scale = scale.clamp_min(torch.finfo(torch.float16).tiny)
+        quantized = torch.round(values / scale.float().unsqueeze(1)).clamp_(-127, 127)
+        return quantized.to(torch.int8), scale
+
+    @staticmethod
+    def dequantize(
+        values: torch.Tensor, scale: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """저장된 임베딩을 네트워크 입력용 float32로 복원합니다.
+
+        Args:
+            values (torch.Tensor): 저장 dtype의 임베딩, shape=[n, dim].
+            scale (Optional[torch.Tensor]): 양자화 스케일 [n], 양자화하지 않았으면 None.
+
+        Returns:
+            torch.Tensor: float32 임베딩, shape=[n, dim].
+        """
+        if scale is None:
+            return values.float()
+        return values.float() * scale.float().unsqueeze(-1)
+
+    def gather(
+        self, name: str, idx: torch.Tensor, out: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
+        """필드 name에서 idx 행들을 gather 합니다. 양자화 필드는 float32로 복원합니다.
+
+        Args:
+            name (str): 필드 이름 ('states', 'cands', 'rewards', 'next_states', 'dones').
+            idx (torch.Tensor): 슬롯 인덱스, 저장 텐서와 같은 디바이스.
+            out (Optional[torch.Tensor]): gather 결과를 쓸 텐서 (저장 dtype).
+
+        Returns:
+            torch.Tensor: gather 결과, shape=[len(idx), ...].
+        """
+        values = torch.index_select(getattr(self, name), 0, idx, out=out)
+        if name not in self.scales:
+            return values
+        return self.dequantize(values, self.scales[name].index_select(0, idx))
+
+    def sample_indices(self, batch_size: int) -> torch.Tensor:
+        """랜덤하게 batch_size 개수만큼 중복 없이 슬롯 인덱스를 샘플링합니다.
+
+        샘플링 전에 대기 중인 transition을 flush하므로 반환된 인덱스의 필드는
+        모두 저장 텐서에 반영되어 있습니다.
 
         Args:
             batch_size (int): 샘플링할 transition 개수
 
         Returns:
-            Tuple:
-                - user_states (List[Any])
-                - content_embs (List[Any])
-                - rewards (List[float])
-                - (next_states, next_cands_embs) (Tuple[List[Any], List[Any]])
-                - dones (List[bool])
+            torch.Tensor: 슬롯 인덱스, shape=[batch_size], dtype=torch.long (CPU).
 
         Raises:
             ValueError: buffer 크기보다 batch_size가 더 클 때 발생
         """
-        if batch_size > len(self.buffer):
+        self.flush()
+        if batch_size > self.size:
             raise ValueError(
-                f"Sample size {batch_size} greater than buffer size {len(self.buffer)}"
+                f"Sample size {batch_size} greater than buffer size {self.size}"
             )
-        batch = random.sample(self.buffer, batch_size)
-        state_action_pairs, rewards, next_transitions, dones = zip(*batch)
-        user_states, content_embs = zip(*state_action_pairs)
-        next_states, next_cands_embs = zip(*next_transitions)
-
-        return (
-            list(user_states),
-            list(content_embs),
-            list(rewards),
-            (list(next_states), list(next_cands_embs)),
-            list(dones),
+        return torch.tensor(
+            random.sample(range(self.size), batch_size), dtype=torch.long
         )
 
+    def count_next_cands(self, indices: List[int]) -> int:
+        """샘플링된 슬롯들의 다음 상태 후보 개수 합을 반환합니다.
+
+        Args:
+            indices (List[int]): 슬롯 인덱스 리스트.
+
+        Returns:
+            int: sum(n_i).
+        """
+        return sum(self.next_cands[i].size(0) for i in indices)
+
+    def gather_next_cands(
+        self,
+        indices: List[int],
+        out: Optional[torch.Tensor] = None,
+        scales_out: Optional[torch.Tensor] = None,
+    ) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+        """샘플링된 슬롯들의 다음 상태 후보군을 하나의 호스트 텐서로 이어붙입니다.
+
+        Args:
+            indices (List[int]): 슬롯 인덱스 리스트.
+            out (Optional[torch.Tensor]): 결과를 쓸 [sum(n_i), content_dim] 텐서.
+                None이면 새로 할당합니다.
+            scales_out (Optional[torch.Tensor]): 양자화 시 스케일을 쓸 [sum(n_i)] 텐서.
+
+        Returns:
+            Tuple[torch.Tensor, Optional[torch.Tensor]]: 이어붙인 후보군
+                [sum(n_i), content_dim]과 (양자화 시) 후보별 스케일 [sum(n_i)].
+                새로 할당하는 경우 pin_memory가 켜져 있으면 pinned 메모리에 둡니다.
+        """
+        if out is None:
+            out = torch.empty(
+                (self.count_next_cands(indices), self.content_dim),
+                dtype=self.emb_dtype,
+                pin_memory=self.pin_memory,
+            )
+        torch.cat([self.next_cands[i] for i in indices], out=out)
+        if not self.quantized:
+            return out, None
+
+        if scales_out is None:
+            scales_out = torch.empty(
+                out.size(0), dtype=torch.float16, pin_memory=self.pin_memory
+            )
+        torch.cat([self.next_cands_scale[i] for i in indices], out=scales_out)
+        return out, scales_out
+
     def __len__(self) -> int:
         """현재 버퍼에 저장된 transition 개수를 반환합니다.
 
         Returns:
             int: 저장된 transition의 개수
         """
-        return len(self.buffer)
+        return self.size
@@ -17,6 +17,7 @@ from components.database.db_utils import (
     get_user_logs,
     get_users,
 )
+from components.embedder.simple import SimpleUserEmbedder
 from components.recommendation.rec_utils import compute_all_q_values
 from components.simulation.random_simulator import RandomResponseSimulator
 from components.simulation.llm_simulator import LLMResponseSimulator
@@ -128,6 +129,15 @@ class ExperimentRunner:
         else:
             raise ValueError(f"Unsupported simulator type: {sim_type}")
 
+        # int8 버퍼는 행마다 스케일 하나를 쓰므로, 체류시간(초)과 [0, 1] 비율이
+        # 한 행에 섞인 simple_user 상태는 비율/타입 특성이 모두 0으로 양자화됨
+        if cfg["agent"]["params"].get("buffer_dtype") == "int8" and isinstance(
+            getattr(embedder, "user_embedder", embedder), SimpleUserEmbedder
+        ):
+            raise ValueError(
+                "buffer_dtype 'int8' is not supported with the simple_user embedder"
+            )
+
         # 환경 및 에이전트 생성
         env = make(
             cfg["env"]["type"],
@@ -174,6 +184,7 @@ class ExperimentRunner:
 
         for ep, query in enumerate(queries, start=1):
             qvalue_list = []
+            episode_start = len(step_metrics)
             try:
                 logging.info(
                     f"\n--- Episode {ep}/{total_eps} (seed={seed}, query={query}) ---"
@@ -283,7 +294,8 @@ class ExperimentRunner:
                             ),
                             "epsilon": getattr(agent, "epsilon", float("nan")),
                             "datetime": datetime.now().isoformat(),
-                            "loss": loss if type(loss) == float else -1,
+                            # 디바이스 텐서 그대로 보관, 에피소드 끝에 한 번에 변환
+                            "loss": loss,
                         }
                     )
 
@@ -323,6 +335,8 @@ class ExperimentRunner:
 
             except Exception as e:
                 logging.error(f"Error in episode {ep}, seed {seed}: {e}", exc_info=True)
+            finally:
+                self._resolve_losses(step_metrics[episode_start:])
 
         # 마지막 모델 및 결과 저장
         final_model_path = os.path.join(model_save_dir, "dqn_model_final.pth")
@@ -332,6 +346,19 @@ class ExperimentRunner:
         self.save_results(step_metrics, step_log_path)
         self.save_results(episode_metrics, episode_log_path)
 
+    def _resolve_losses(self, rows: List[Dict[str, Any]]) -> None:
+        """스텝 메트릭의 디바이스 손실 텐서를 한 번의 전송으로 float로 변환합니다.
+
+        학습하지 않은 스텝(None)의 손실은 -1로 기록합니다.
+
+        Args:
+            rows (List[Dict[str, Any]]): 변환할 스텝 메트릭 리스트 (제자리 수정)
+        """
+        losses = [row["loss"] for row in rows if isinstance(row["loss"], torch.Tensor)]
+        values = iter(torch.stack(losses).tolist() if losses else [])
+        for row in rows:
+            row["loss"] = next(values) if isinstance(row["loss"], torch.Tensor) else -1
+
     def save_results(self, metrics: List[Dict[str, Any]], csv_path: str) -> None:
         """
         메트릭 리스트를 CSV 파일에 저장합니다.